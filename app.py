@@ -6,6 +6,8 @@
 # ✅ Itens em linhas com última linha em branco
 # ✅ Edição mantém itens via ItensJSON
 # ✅ Aba Histórico: PDF / Editar / Excluir
+# ✅ Arquivo por ano: ano corrente em orcamentos, anos anteriores em orcamentos_arquivo
+# ✅ Catálogo de itens: busca por prefixo/trigrama + último preço e mediana
 # =============================================================================
 
 import os
@@ -13,7 +15,14 @@ import re
 import json
 import time
 import uuid
+import heapq
+import logging
+import bisect
+import threading
+import statistics
+import unicodedata
 import urllib.parse
+from collections import Counter
 from datetime import datetime
 
 import streamlit as st
@@ -21,6 +30,7 @@ import pandas as pd
 from fpdf import FPDF
 
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
 
 
@@ -36,6 +46,18 @@ ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 LOGO_PNG = os.path.join(ASSETS_DIR, "logo.png")
 LOGO_JPG = os.path.join(ASSETS_DIR, "logo.jpg")
 
+# Tabela "quente" (ano corrente) e tabela de arquivo (anos anteriores)
+TABELA_ATIVA = "public.orcamentos"
+TABELA_ARQUIVO = "public.orcamentos_arquivo"
+
+# Colunas copiadas entre ativa e arquivo (explícitas: não dependem da ordem física)
+COLUNAS_ORCAMENTO = "id, data, cliente, whatsapp, status, total, itens, itensjson, created_at"
+
+# Ano do orçamento = prefixo do ID ANO-XXX
+SQL_ANO_ID = "split_part(id, '-', 1)"
+# IDs antigos sem prefixo ANO- ficam sempre na tabela ativa, junto do ano corrente
+SQL_ID_SEM_ANO = f"{SQL_ANO_ID} !~ '^[0-9]{{4}}$'"
+
 
 # =========================
 # CSS (Tab 2 legível no tema escuro)
@@ -170,6 +192,20 @@ def garantir_linha_em_branco(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def aplicar_edicoes_tabela(df: pd.DataFrame, estado: dict) -> pd.DataFrame:
+    """Aplica no DataFrame original as edições pendentes do st.data_editor (session_state[key])."""
+    df = df.reset_index(drop=True).copy()
+    estado = estado or {}
+    for i, mudancas in (estado.get("edited_rows") or {}).items():
+        for col, valor in mudancas.items():
+            df.at[int(i), col] = valor
+    df = df.drop(index=[int(i) for i in estado.get("deleted_rows") or []], errors="ignore")
+    novas = pd.DataFrame(estado.get("added_rows") or [])
+    # linhas novas sem "Item" digitado chegam sem a chave (NaN) -> não podem virar "nan"
+    df = pd.concat([df, novas], ignore_index=True)
+    return df.fillna({"Item": "", "Qtd": 1, "Valor Unit.": 0.0})
+
+
 def limpar_calcular(df: pd.DataFrame):
     """Remove linhas vazias, calcula Subtotal/Total e gera Itens + ItensJSON."""
     df = df.copy()
@@ -205,12 +241,119 @@ def get_conn():
     return psycopg2.connect(db_url)
 
 
-def ler_base() -> pd.DataFrame:
-    """Lê tudo do banco e devolve DataFrame no formato do app."""
+@st.cache_resource
+def preparar_arquivo(ano_corrente: int) -> bool:
+    """
+    Job de arquivamento (roda 1x por processo e por ano):
+    cria orcamentos_arquivo e move para lá os orçamentos de anos anteriores.
+    Sem permissão de CREATE e sem o arquivo criado por fora -> False (fica no cache).
+    Outros erros sobem e não são cacheados: a próxima chamada tenta de novo.
+    """
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"create table if not exists {TABELA_ARQUIVO} (like {TABELA_ATIVA} including all)")
+                cur.execute(f"create index if not exists orcamentos_ano_idx on {TABELA_ATIVA} (({SQL_ANO_ID}))")
+                cur.execute(f"create index if not exists orcamentos_arquivo_ano_idx on {TABELA_ARQUIVO} (({SQL_ANO_ID}))")
+            conn.commit()
+    except psycopg2.errors.InsufficientPrivilege as e:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("select to_regclass(%s)", (TABELA_ARQUIVO,))
+                existe = cur.fetchone()[0] is not None
+        if not existe:
+            logging.warning("Sem permissão para criar %s, lendo só %s: %s", TABELA_ARQUIVO, TABELA_ATIVA, e)
+            return False
+
+    arquivar_anos_anteriores(ano_corrente)
+    return True
+
+
+def tabelas_orcamentos() -> tuple:
+    """Tabelas com orçamentos: ativa + arquivo (se o arquivo existe)."""
+    try:
+        com_arquivo = preparar_arquivo(datetime.now().year)
+    except psycopg2.Error as e:
+        logging.warning("Job de arquivamento falhou (nova tentativa na próxima leitura): %s", e)
+        com_arquivo = False
+    if com_arquivo:
+        return (TABELA_ATIVA, TABELA_ARQUIVO)
+    return (TABELA_ATIVA,)
+
+
+def arquivar_anos_anteriores(ano_corrente: int) -> int:
+    """
+    Move (numa única transação) os orçamentos com ANO < ano_corrente para o arquivo.
+    IDs que já existem no arquivo ficam na tabela ativa (continuam visíveis) e geram aviso.
+    """
+    # Comparação como texto (ANO tem 4 dígitos): sem cast ::int que quebraria em IDs antigos
+    filtro = f"{SQL_ANO_ID} ~ '^[0-9]{{4}}$' and {SQL_ANO_ID} < %s"
+    ja_arquivado = f"exists (select 1 from {TABELA_ARQUIVO} a where a.id = o.id)"
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                with movidos as (
+                    delete from {TABELA_ATIVA} o
+                    where {filtro} and not {ja_arquivado}
+                    returning {COLUNAS_ORCAMENTO}
+                )
+                insert into {TABELA_ARQUIVO} ({COLUNAS_ORCAMENTO})
+                select {COLUNAS_ORCAMENTO} from movidos
+                """,
+                (str(ano_corrente),),
+            )
+            movidos = cur.rowcount
+            cur.execute(
+                f"select id from {TABELA_ATIVA} o where {filtro} and {ja_arquivado}",
+                (str(ano_corrente),),
+            )
+            conflitos = [r[0] for r in cur.fetchall()]
+        conn.commit()
+    if conflitos:
+        logging.warning("IDs já existentes em %s, mantidos em %s: %s", TABELA_ARQUIVO, TABELA_ATIVA, conflitos)
+    return movidos
+
+
+@st.cache_data(ttl=600)
+def listar_anos() -> list:
+    """Anos existentes, do mais recente para o mais antigo (cache; limpo ao salvar/excluir)."""
+    selects = " union ".join(f"select distinct {SQL_ANO_ID} from {t}" for t in tabelas_orcamentos())
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(selects)
+            anos = {int(r[0]) for r in cur.fetchall() if str(r[0]).isdigit()}
+    anos.add(datetime.now().year)
+    return sorted(anos, reverse=True)
+
+
+def ler_base(anos=None) -> pd.DataFrame:
+    """
+    Lê do banco e devolve DataFrame no formato do app.
+    Por padrão só o ano corrente (+ IDs legados sem ANO-); anos anteriores só
+    quando pedidos em `anos` (aí o arquivo também é consultado).
+    """
+    ano_corrente = datetime.now().year
+    anos = [int(a) for a in (anos or [ano_corrente])]
+
+    tabelas = tabelas_orcamentos()
+    if not any(a < ano_corrente for a in anos):
+        tabelas = tabelas[:1]
+
+    # IDs sem ANO- (legado) aparecem junto do ano corrente
+    filtro = f"{SQL_ANO_ID} = any(%s)"
+    if ano_corrente in anos:
+        filtro = f"({filtro} or {SQL_ID_SEM_ANO})"
+
+    selects = " union all ".join(
+        f"select {COLUNAS_ORCAMENTO} from {t} where {filtro}" for t in tabelas
+    )
+    params = [[str(a) for a in anos]] * len(tabelas)
+
     with get_conn() as conn:
         with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
             cur.execute(
-                """
+                f"""
                 select
                     id       as "ID",
                     data     as "Data",
@@ -220,9 +363,10 @@ def ler_base() -> pd.DataFrame:
                     coalesce(total, 0)::text as "Total",
                     coalesce(itens, '')      as "Itens",
                     coalesce(itensjson, '')  as "ItensJSON"
-                from public.orcamentos
+                from ({selects}) o
                 order by created_at desc;
-                """
+                """,
+                params,
             )
             rows = cur.fetchall()
 
@@ -232,6 +376,17 @@ def ler_base() -> pd.DataFrame:
     return df.fillna("")
 
 
+def ler_itens(tabelas, ids=None) -> list:
+    """(id, itensjson) das tabelas indicadas (opcionalmente só `ids`), para o catálogo."""
+    filtro = " where id = any(%s)" if ids is not None else ""
+    selects = " union all ".join(f"select id, coalesce(itensjson, '') from {t}{filtro}" for t in tabelas)
+    params = [list(ids)] * len(tabelas) if ids is not None else None
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(selects, params)
+            return cur.fetchall()
+
+
 def salvar_orcamento(novo: dict):
     """Insere (novo) no banco."""
     with get_conn() as conn:
@@ -257,33 +412,39 @@ def salvar_orcamento(novo: dict):
 
 
 def atualizar_orcamento(os_id: str, dados: dict):
-    """Atualiza (edição) mantendo o mesmo ID."""
+    """Atualiza (edição) mantendo o mesmo ID (na tabela ativa ou no arquivo)."""
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                update public.orcamentos
-                set data=%s, cliente=%s, whatsapp=%s, status=%s, total=%s, itens=%s, itensjson=%s
-                where id=%s
-                """,
-                (
-                    dados["Data"],
-                    dados["Cliente"],
-                    dados["WhatsApp"],
-                    dados["Status"],
-                    float(dados["Total"]),
-                    dados["Itens"],
-                    dados["ItensJSON"],
-                    os_id,
-                ),
-            )
+            for tabela in tabelas_orcamentos():
+                cur.execute(
+                    f"""
+                    update {tabela}
+                    set data=%s, cliente=%s, whatsapp=%s, status=%s, total=%s, itens=%s, itensjson=%s
+                    where id=%s
+                    """,
+                    (
+                        dados["Data"],
+                        dados["Cliente"],
+                        dados["WhatsApp"],
+                        dados["Status"],
+                        float(dados["Total"]),
+                        dados["Itens"],
+                        dados["ItensJSON"],
+                        os_id,
+                    ),
+                )
+                if cur.rowcount:
+                    break
         conn.commit()
 
 
 def excluir_orcamento(os_id: str):
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute("delete from public.orcamentos where id=%s", (os_id,))
+            for tabela in tabelas_orcamentos():
+                cur.execute(f"delete from {tabela} where id=%s", (os_id,))
+                if cur.rowcount:
+                    break
         conn.commit()
 
 
@@ -313,6 +474,209 @@ def gerar_novo_id_ano(base: pd.DataFrame, data_ref=None) -> str:
     return f"{ano_atual}-{novo_seq:03d}"
 
 
+# =========================
+# CATÁLOGO DE ITENS (memória de preços + autocomplete)
+# =========================
+def normalizar_item(nome: str) -> str:
+    """Chave de busca: minúsculas, sem acento e com espaços simples."""
+    s = unicodedata.normalize("NFKD", str(nome or ""))
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(s.lower().split())
+
+
+def trigramas(s: str) -> set:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def itens_json_para_precos(itens_json: str) -> list:
+    """ItensJSON -> [(Item, Valor Unit.)] ignorando linhas vazias/inválidas."""
+    try:
+        registros = json.loads(itens_json) if str(itens_json or "").strip() else []
+    except Exception:
+        return []
+    linhas = []
+    for r in registros if isinstance(registros, list) else []:
+        if not isinstance(r, dict) or not str(r.get("Item", "")).strip():
+            continue
+        try:
+            preco = float(r.get("Valor Unit.", 0) or 0)
+        except (TypeError, ValueError):
+            preco = 0.0
+        linhas.append((str(r["Item"]).strip(), preco))
+    return linhas
+
+
+class CatalogoItens:
+    """
+    Catálogo em memória montado a partir do ItensJSON dos orçamentos.
+    - busca por prefixo: lista ordenada de chaves + bisect
+    - busca no meio do nome (ex: "r410"): índice de trigramas
+    - por item: nº de usos, preço do orçamento mais recente e mediana
+    Mantido incrementalmente por orçamento (registrar / remover).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usos = {}       # chave -> {os_id: [(nome, preço), ...]}
+        self._por_orc = {}    # os_id -> {chaves}
+        self._json = {}       # os_id -> ItensJSON já aplicado
+        self._ids_ativos = set()  # os_ids vistos na tabela ativa na última sincronização
+        self._ordenadas = []  # chaves ordenadas (prefixo)
+        self._trigramas = {}  # trigrama -> {chaves}
+        self._resumo = {}     # chave -> {"Item", "Usos", "Último", "Mediana"}
+        self.sincronizado_em = time.time()
+
+    def registrar(self, os_id: str, itens_json: str):
+        """Substitui a contribuição do orçamento os_id (novo, editado ou excluído com "")."""
+        with self._lock:
+            # salvo por este app: a próxima sincronização confere se ainda existe
+            self._ids_ativos.add(str(os_id))
+        self.registrar_varios([(os_id, itens_json)])
+
+    def remover(self, os_id: str):
+        self.registrar(os_id, "")
+
+    def registrar_varios(self, linhas):
+        """
+        Aplica vários orçamentos [(os_id, itens_json)] e recalcula cada item
+        afetado uma única vez (montagem e sincronização em lote).
+        """
+        with self._lock:
+            alteradas = set()
+            for os_id, itens_json in linhas:
+                alteradas |= self._aplicar(str(os_id), itens_json)
+            for chave in alteradas:
+                self._recalcular(chave)
+
+    def sincronizar(self, ativos: list, arquivados: list = ()):
+        """
+        Reaplica os orçamentos lidos da tabela ativa (pega o que outras instâncias salvaram).
+        `arquivados`: os que sumiram da ativa mas estão no arquivo (continuam no catálogo).
+        Os demais que sumiram da ativa foram excluídos e saem do catálogo.
+        """
+        vistos = {str(o) for o, _ in ativos}
+        mantidos = {str(o) for o, _ in arquivados}
+        with self._lock:
+            sumiram = self._ids_ativos - vistos - mantidos
+            self._ids_ativos = vistos
+        self.registrar_varios(
+            [(o, j) for o, j in list(ativos) + list(arquivados) if self._json.get(str(o)) != j]
+            + [(o, "") for o in sumiram]
+        )
+        self.sincronizado_em = time.time()
+
+    def ids_ativos(self) -> set:
+        with self._lock:
+            return set(self._ids_ativos)
+
+    def _aplicar(self, os_id: str, itens_json: str) -> set:
+        """Troca a contribuição de os_id nos índices (sem recalcular). Devolve as chaves afetadas."""
+        novas = {}
+        for nome, preco in itens_json_para_precos(itens_json):
+            chave = normalizar_item(nome)
+            if chave:
+                novas.setdefault(chave, []).append((nome, preco))
+
+        antigas = self._por_orc.pop(os_id, set())
+        self._json.pop(os_id, None)
+        for chave in antigas:
+            self._usos[chave].pop(os_id, None)
+
+        for chave, linhas in novas.items():
+            if chave not in self._usos:
+                self._usos[chave] = {}
+                bisect.insort(self._ordenadas, chave)
+                for t in trigramas(chave):
+                    self._trigramas.setdefault(t, set()).add(chave)
+            self._usos[chave][os_id] = linhas
+        if novas:
+            self._por_orc[os_id] = set(novas)
+            self._json[os_id] = itens_json
+
+        return antigas | set(novas)
+
+    def _recalcular(self, chave: str):
+        usos = self._usos.get(chave)
+        if not usos:
+            self._usos.pop(chave, None)
+            self._resumo.pop(chave, None)
+            i = bisect.bisect_left(self._ordenadas, chave)
+            if i < len(self._ordenadas) and self._ordenadas[i] == chave:
+                del self._ordenadas[i]
+            for t in trigramas(chave):
+                grupo = self._trigramas.get(t)
+                if grupo is not None:
+                    grupo.discard(chave)
+                    if not grupo:
+                        del self._trigramas[t]
+            return
+
+        ids = sorted(usos, key=id_key)
+        com_preco = [o for o in ids if any(p > 0 for _, p in usos[o])]
+        precos = [p for o in ids for _, p in usos[o] if p > 0]
+        ultimo = [p for _, p in usos[com_preco[-1]] if p > 0][-1] if com_preco else 0.0
+
+        # Nome exibido = grafia mais usada (empate: a mais antiga), não a última digitada
+        nomes = Counter(nome for o in ids for nome, _ in usos[o])
+
+        self._resumo[chave] = {
+            "Item": nomes.most_common(1)[0][0],
+            "Usos": sum(len(usos[o]) for o in ids),
+            "Último": float(ultimo),
+            "Mediana": float(statistics.median(precos)) if precos else 0.0,
+        }
+
+    def sugerir(self, texto: str, limite: int = 8) -> list:
+        """Itens que começam com `texto` (primeiro) ou que o contêm, mais usados antes."""
+        q = normalizar_item(texto)
+        if not q:
+            return []
+
+        with self._lock:
+            prefixo = []
+            i = bisect.bisect_left(self._ordenadas, q)
+            while i < len(self._ordenadas) and self._ordenadas[i].startswith(q):
+                prefixo.append(self._ordenadas[i])
+                i += 1
+
+            contem = []
+            if len(q) >= 3:
+                grupos = sorted((self._trigramas.get(t, set()) for t in trigramas(q)), key=len)
+                candidatos = set.intersection(*grupos) if grupos and grupos[0] else set()
+                contem = [c for c in candidatos if q in c and not c.startswith(q)]
+
+            def mais_usados(c):
+                return -self._resumo[c]["Usos"]
+
+            chaves = heapq.nsmallest(limite, prefixo, key=mais_usados)
+            chaves += heapq.nsmallest(limite - len(chaves), contem, key=mais_usados)
+            return [dict(self._resumo[c]) for c in chaves]
+
+
+@st.cache_resource
+def carregar_catalogo() -> CatalogoItens:
+    """Monta o catálogo 1x por processo (arquivo + ativa); depois só incremental."""
+    catalogo = CatalogoItens()
+    arquivo = tabelas_orcamentos()[1:]
+    if arquivo:
+        catalogo.registrar_varios(ler_itens(arquivo))
+    catalogo.sincronizar(ler_itens((TABELA_ATIVA,)))
+    return catalogo
+
+
+def catalogo_sincronizado() -> CatalogoItens:
+    """Catálogo do processo; a cada hora relê só a tabela ativa (o arquivo não é reescaneado)."""
+    catalogo = carregar_catalogo()
+    if time.time() - catalogo.sincronizado_em > 3600:
+        catalogo.sincronizado_em = time.time()
+        ativos = ler_itens((TABELA_ATIVA,))
+        sumiram = catalogo.ids_ativos() - {str(o) for o, _ in ativos}
+        tabelas = tabelas_orcamentos()[1:]
+        arquivados = ler_itens(tabelas, ids=sumiram) if sumiram and tabelas else []
+        catalogo.sincronizar(ativos, arquivados)
+    return catalogo
+
+
 # =========================
 # PDF (Logo + "Orçamento Nº 003/26")
 # =========================
@@ -382,6 +746,35 @@ for k, v in defaults.items():
         st.session_state[k] = v
 
 
+def itens_do_form() -> pd.DataFrame:
+    """Itens iniciais da tabela (edição mantém valores antigos; itens vindos do catálogo)."""
+    if st.session_state.get("id_edicao") is not None:
+        return itens_json_para_df(
+            st.session_state.get("form_itens_json", ""),
+            st.session_state.get("form_itens_txt", ""),
+            st.session_state.get("form_total_antigo", 0.0)
+        )
+    if st.session_state.get("form_itens_json"):
+        return itens_json_para_df(st.session_state["form_itens_json"])
+    return pd.DataFrame([{"Item": "", "Qtd": 1, "Valor Unit.": 0.0}])
+
+
+def adicionar_item_catalogo(sugestao: dict):
+    """
+    Callback do "➕ Adicionar": junta o que já foi digitado na tabela
+    com o item do catálogo (com o último preço) e recarrega a tabela.
+    """
+    df = aplicar_edicoes_tabela(
+        garantir_linha_em_branco(itens_do_form()),
+        st.session_state.get(st.session_state["chave_tabela"]),
+    )
+    df.loc[len(df)] = {"Item": sugestao["Item"], "Qtd": 1, "Valor Unit.": float(sugestao["Último"])}
+    _, _, itens_txt, itens_json = limpar_calcular(df)
+    st.session_state["form_itens_json"] = itens_json
+    st.session_state["form_itens_txt"] = itens_txt
+    st.session_state["chave_tabela"] = str(uuid.uuid4())
+
+
 def reset_form():
     st.session_state["id_edicao"] = None
     st.session_state["form_cliente"] = ""
@@ -392,9 +785,18 @@ def reset_form():
     st.session_state["chave_tabela"] = str(uuid.uuid4())
 
 
+def seletor_anos(chave: str) -> list:
+    """Anos a consultar (padrão: só o ano corrente; anos arquivados só se escolhidos)."""
+    ano_corrente = datetime.now().year
+    anos = st.multiselect("Ano(s)", listar_anos(), default=[ano_corrente], key=chave)
+    return anos or [ano_corrente]
+
+
 # =========================
 # INTERFACE
 # =========================
+tabelas_orcamentos()
+
 st.title(APP_TITLE)
 tab1, tab2, tab3 = st.tabs(["📝 Novo Serviço", "📂 Histórico", "📊 Financeiro"])
 
@@ -402,7 +804,9 @@ tab1, tab2, tab3 = st.tabs(["📝 Novo Serviço", "📂 Histórico", "📊 Finan
 # -------------------------
 # TAB 1 — NOVO / EDIÇÃO
 # -------------------------
-with tab1:
+# st.fragment: editar a tabela/campos reroda só esta aba (sem ler o banco das abas 2 e 3)
+@st.fragment
+def aba_novo_servico():
     editando = st.session_state.get("id_edicao") is not None
 
     if editando:
@@ -411,52 +815,79 @@ with tab1:
             reset_form()
             st.rerun()
 
-    with st.form("form_orcamento"):
-        col1, col2 = st.columns(2)
+    col1, col2 = st.columns(2)
 
-        with col1:
-            cliente = st.text_input("Cliente", st.session_state.get("form_cliente", ""))
-            whatsapp = st.text_input("WhatsApp", st.session_state.get("form_whats", ""))
+    with col1:
+        cliente = st.text_input("Cliente", st.session_state.get("form_cliente", ""))
+        whatsapp = st.text_input("WhatsApp", st.session_state.get("form_whats", ""))
 
-        with col2:
-            data = st.date_input("Data", st.session_state.get("form_data", datetime.now().date()))
-            status_opcoes = ["Pendente", "Em Andamento", "Concluído", "Cancelado"]
-            status_atual = st.session_state.get("form_status", "Pendente")
-            status = st.selectbox(
-                "Status",
-                status_opcoes,
-                index=status_opcoes.index(status_atual) if status_atual in status_opcoes else 0
-            )
+    with col2:
+        data = st.date_input("Data", st.session_state.get("form_data", datetime.now().date()))
+        status_opcoes = ["Pendente", "Em Andamento", "Concluído", "Cancelado"]
+        status_atual = st.session_state.get("form_status", "Pendente")
+        status = st.selectbox(
+            "Status",
+            status_opcoes,
+            index=status_opcoes.index(status_atual) if status_atual in status_opcoes else 0
+        )
 
-        # tabela inicial (mantém valores antigos na edição)
-       
-        if editando:
-            df_init = itens_json_para_df(
-                st.session_state.get("form_itens_json", ""),
-                st.session_state.get("form_itens_txt", ""),
-                st.session_state.get("form_total_antigo", 0.0) 
-            )
-            
-        else:
-            df_init = pd.DataFrame([{"Item": "", "Qtd": 1, "Valor Unit.": 0.0}])
+    # Catálogo: itens já usados em orçamentos, com memória de preço
+    catalogo = catalogo_sincronizado()
+    busca = st.text_input(
+        "🔎 Buscar item no catálogo",
+        key="busca_catalogo",
+        placeholder="ex: carga de gás, limpeza split, r410...",
+    )
+    sugestoes = catalogo.sugerir(busca)
 
-        df_init = garantir_linha_em_branco(df_init)
+    if busca and not sugestoes:
+        st.caption("Nenhum item encontrado no catálogo.")
 
-        st.caption("A última linha fica em branco para você adicionar um novo item.")
-        tabela = st.data_editor(
-            df_init,
-            num_rows="dynamic",
+    if sugestoes:
+        st.dataframe(
+            pd.DataFrame(sugestoes),
             hide_index=True,
             use_container_width=True,
-            key=st.session_state.get("chave_tabela", "tabela_default"),
             column_config={
-                "Item": st.column_config.TextColumn("Item", width="large"),
-                "Qtd": st.column_config.NumberColumn("Qtd", min_value=1, step=1),
-                "Valor Unit.": st.column_config.NumberColumn("Valor Unit.", min_value=0.0, step=0.5, format="R$ %.2f"),
+                "Último": st.column_config.NumberColumn("Último", format="R$ %.2f"),
+                "Mediana": st.column_config.NumberColumn("Mediana", format="R$ %.2f"),
             },
         )
+        col_sug, col_add = st.columns([3, 1])
+        with col_sug:
+            escolhido = st.selectbox(
+                "Item do catálogo",
+                range(len(sugestoes)),
+                format_func=lambda i: f"{sugestoes[i]['Item']} ({fmt_brl(sugestoes[i]['Último'])})",
+                label_visibility="collapsed",
+            )
+        with col_add:
+            st.button(
+                "➕ Adicionar",
+                use_container_width=True,
+                on_click=adicionar_item_catalogo,
+                args=(sugestoes[escolhido],),
+            )
 
-        submit = st.form_submit_button("Salvar")
+    # tabela inicial (mantém valores antigos na edição)
+    # fora de st.form: as edições ficam no session_state e o "➕ Adicionar" não as perde
+    df_init = garantir_linha_em_branco(itens_do_form())
+
+    st.caption("A última linha fica em branco para você adicionar um novo item.")
+    tabela = st.data_editor(
+        df_init,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key=st.session_state.get("chave_tabela", "tabela_default"),
+        column_config={
+            "Item": st.column_config.TextColumn("Item", width="large"),
+            "Qtd": st.column_config.NumberColumn("Qtd", min_value=1, step=1),
+            "Valor Unit.": st.column_config.NumberColumn("Valor Unit.", min_value=0.0, step=0.5, format="R$ %.2f"),
+        },
+    )
+
+    submit = st.button("Salvar")
 
     if submit:
         if not str(cliente).strip():
@@ -466,7 +897,8 @@ with tab1:
         tabela_limpa, total, itens_txt, itens_json = limpar_calcular(tabela)
         whatsapp_norm = apenas_digitos(whatsapp)
 
-        base = ler_base()
+        # Só o ano do orçamento importa para gerar o próximo ANO-XXX
+        base = ler_base(anos=[data.year])
 
         # EDITAR (mantém ID)
         if editando:
@@ -495,6 +927,9 @@ with tab1:
                 "ItensJSON": itens_json,
             })
 
+        catalogo.registrar(os_id, itens_json)
+        listar_anos.clear()
+
         st.session_state["ultimo_orcamento"] = {
             "id": os_id,
             "cliente": str(cliente).strip(),
@@ -545,11 +980,15 @@ with tab1:
             )
 
 
+with tab1:
+    aba_novo_servico()
+
+
 # -------------------------
 # TAB 2 — HISTÓRICO (PDF + Editar + Excluir)
 # -------------------------
 with tab2:
-    df = ler_base()
+    df = ler_base(anos=seletor_anos("anos_historico"))
 
     if df.empty:
         st.info("Ainda não há orçamentos salvos.")
@@ -644,6 +1083,8 @@ with tab2:
                 confirmar = st.checkbox("Confirmar exclusão", key=f"conf_{selecionado_id}")
                 if st.button("🗑️ Excluir", disabled=not confirmar):
                     excluir_orcamento(str(selecionado_id))
+                    catalogo_sincronizado().remover(str(selecionado_id))
+                    listar_anos.clear()
                     st.success(f"Orçamento {selecionado_id} excluído.")
                     time.sleep(0.2)
                     st.rerun()
@@ -657,7 +1098,7 @@ with tab2:
 # TAB 3 — FINANCEIRO
 # -------------------------
 with tab3:
-    df = ler_base()
+    df = ler_base(anos=seletor_anos("anos_financeiro"))
 
     if df.empty:
         st.info("Sem dados ainda.")